@@ -29,6 +29,8 @@ __version__ = '0.4.3'
 
 # Cope with changes to name-space to remove most of the camel-case
 _import_map = {}
+_package_path = __path__[0]
+_import_prefixes = tuple(sorted(_import_map, key=len, reverse=True))
 
 
 class EQcorrscanDeprecationWarning(UserWarning):
@@ -51,17 +53,13 @@ class EQcorrscanRestructureAndLoad(object):
     """
 
     def find_module(self, fullname, path=None):
+        if not fullname.startswith(_import_prefixes):
+            return None
         # Compatibility with namespace paths.
         if hasattr(path, "_path"):
             path = path._path
 
-        if not path or not path[0].startswith(__path__[0]):
-            return None
-
-        for key in _import_map.keys():
-            if fullname.startswith(key):
-                break
-        else:
+        if not path or not path[0].startswith(_package_path):
             return None
         return self
 
@@ -73,12 +71,10 @@ class EQcorrscanRestructureAndLoad(object):
         elif name in _import_map:
             new_name = _import_map[name]
         else:
-            new_name = name
-            for old, new in _import_map.items():
-                if not new_name.startswith(old):
-                    continue
-                new_name = new_name.replace(old, new)
-                break
+            for old in _import_prefixes:
+                if name.startswith(old):
+                    new_name = name.replace(old, _import_map[old])
+                    break
             else:
                 return None
 
@@ -98,7 +94,10 @@ class EQcorrscanRestructureAndLoad(object):
         return module
 
 
-sys.meta_path.append(EQcorrscanRestructureAndLoad())
+# The finder is consulted for every import in the process, so only register
+# it when there are legacy names to redirect.
+if _import_map:
+    sys.meta_path.append(EQcorrscanRestructureAndLoad())
 
 if __name__ == '__main__':
     import doctest
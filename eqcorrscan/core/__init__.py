@@ -14,8 +14,11 @@ import warnings
 __all__ = ['template_gen', 'match_filter', 'lag_calc', 'subspace']
 
 _import_map = {}
+_package_path = __path__[0]
+_import_prefixes = tuple(sorted(_import_map, key=len, reverse=True))
 
-_depreciated = ['template_gen.from_sfile', 'template_gen.from_contbase']
+_depreciated = frozenset([
+    'template_gen.from_sfile', 'template_gen.from_contbase'])
 
 
 class EQcorrscanDeprecationWarning(UserWarning):
@@ -30,17 +33,13 @@ class EQcorrscanRestructureAndLoad(object):
     Path finder and module loader for transitioning
     """
     def find_module(self, fullname, path=None):
+        if not fullname.startswith(_import_prefixes):
+            return None
         # Compatibility with namespace paths.
         if hasattr(path, "_path"):
             path = path._path
 
-        if not path or not path[0].startswith(__path__[0]):
-            return None
-
-        for key in _import_map.keys():
-            if fullname.startswith(key):
-                break
-        else:
+        if not path or not path[0].startswith(_package_path):
             return None
         return self
 
@@ -56,12 +55,10 @@ class EQcorrscanRestructureAndLoad(object):
                 "%s is no longer supported, use template_gen.from_meta_file" %
                 name)
         else:
-            new_name = name
-            for old, new in _import_map.items():
-                if not new_name.startswith(old):
-                    continue
-                new_name = new_name.replace(old, new)
-                break
+            for old in _import_prefixes:
+                if name.startswith(old):
+                    new_name = name.replace(old, _import_map[old])
+                    break
             else:
                 return None
 
@@ -81,7 +78,8 @@ class EQcorrscanRestructureAndLoad(object):
         return module
 
 
-sys.meta_path.append(EQcorrscanRestructureAndLoad())
+if _import_map:
+    sys.meta_path.append(EQcorrscanRestructureAndLoad())
 
 if __name__ == '__main__':
     import doctest
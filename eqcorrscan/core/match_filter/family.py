@@ -325,8 +325,13 @@ class Family(object):
         2
         """
         _detections = []
-        [_detections.append(d) for d in self.detections
-         if not _detections.count(d)]
+        # Equal detections share an id, so only compare within an id
+        seen = dict()
+        for d in self.detections:
+            same_id = seen.setdefault(d.id, [])
+            if d not in same_id:
+                same_id.append(d)
+                _detections.append(d)
         self.detections = _detections
         return self
 
@@ -12,6 +12,9 @@ with data and output the detections.
     (https://www.gnu.org/copyleft/lesser.html)
 """
 import logging
+from collections import defaultdict
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
 from timeit import default_timer
 
 import numpy as np
@@ -81,7 +84,9 @@ def _group_detect(templates, stream, threshold, threshold_type, trig_int,
     :type templates: list
     :param templates: List of :class:`eqcorrscan.core.match_filter.Template`
     :type stream: `obspy.core.stream.Stream`
-    :param stream: Continuous data to detect within using the Template.
+    :param stream:
+        Continuous data to detect within using the Template, will be left
+        intact.
     :type threshold: float
     :param threshold:
         Threshold level, if using `threshold_type='MAD'` then this will be
@@ -163,9 +168,8 @@ def _group_detect(templates, stream, threshold, threshold_type, trig_int,
     # Check that they are all processed the same.
     lap = 0.0
     for template in templates:
-        starts = [t.stats.starttime for t in template.st.sort(['starttime'])]
-        if starts[-1] - starts[0] > lap:
-            lap = starts[-1] - starts[0]
+        starts = [t.stats.starttime for t in template.st]
+        lap = max(lap, max(starts) - min(starts))
         if not template.same_processing(master):
             raise MatchFilterError('Templates must be processed the same.')
     if overlap is None:
@@ -188,12 +192,14 @@ def _group_detect(templates, stream, threshold, threshold_type, trig_int,
             cores=process_cores, stream=stream, daylong=daylong,
             ignore_length=ignore_length, ignore_bad_data=ignore_bad_data,
             overlap=overlap)
-        for _st in streams:
-            Logger.debug(f"Processed stream:\n{_st.__str__(extended=True)}")
+        if Logger.isEnabledFor(logging.DEBUG):
+            for _st in streams:
+                Logger.debug(
+                    f"Processed stream:\n{_st.__str__(extended=True)}")
     else:
         Logger.warning('Not performing any processing on the continuous data.')
-        streams = [stream]
-    detections = []
+        # Traces are trimmed in place below, keep the input intact.
+        streams = [stream.copy()]
     party = Party()
     if group_size is not None:
         n_groups = int(len(templates) / group_size)
@@ -202,14 +208,21 @@ def _group_detect(templates, stream, threshold, threshold_type, trig_int,
     else:
         n_groups = 1
     for st_chunk in streams:
-        chunk_start, chunk_end = (min(tr.stats.starttime for tr in st_chunk),
-                                  max(tr.stats.endtime for tr in st_chunk))
+        chunk_start = st_chunk[0].stats.starttime
+        chunk_end = st_chunk[0].stats.endtime
+        for tr in st_chunk[1:]:
+            if tr.stats.starttime < chunk_start:
+                chunk_start = tr.stats.starttime
+            if tr.stats.endtime > chunk_end:
+                chunk_end = tr.stats.endtime
         Logger.info(
             f'Computing detections between {chunk_start} and {chunk_end}')
-        st_chunk.trim(starttime=chunk_start, endtime=chunk_end)
+        # No need to trim to chunk_start and chunk_end: they are the extent
+        # of the data, so only the lengths need to be made equal.
+        chunk_npts = st_chunk[0].stats.npts
         for tr in st_chunk:
-            if len(tr) > len(st_chunk[0]):
-                tr.data = tr.data[0:len(st_chunk[0])]
+            if tr.stats.npts > chunk_npts:
+                tr.data = tr.data[0:chunk_npts]
         for i in range(n_groups):
             if group_size is not None:
                 end_group = (i + 1) * group_size
@@ -219,8 +232,8 @@ def _group_detect(templates, stream, threshold, threshold_type, trig_int,
             else:
                 end_group = len(templates)
                 start_group = 0
-            template_group = [t for t in templates[start_group: end_group]]
-            detections += match_filter(
+            template_group = templates[start_group: end_group]
+            detections = match_filter(
                 template_names=[t.name for t in template_group],
                 template_list=[t.st for t in template_group], st=st_chunk,
                 xcorr_func=xcorr_func, concurrency=concurrency,
@@ -228,15 +241,20 @@ def _group_detect(templates, stream, threshold, threshold_type, trig_int,
                 trig_int=trig_int, plot=plot, plotdir=plotdir, cores=cores,
                 full_peaks=full_peaks, peak_cores=process_cores,
                 **kwargs)
+            template_detections = defaultdict(list)
+            for detection in detections:
+                template_detections[detection.template_name].append(detection)
             for template in template_group:
                 family = Family(template=template, detections=[])
-                for detection in detections:
-                    if detection.template_name == template.name:
-                        for pick in detection.event.picks:
-                            pick.time += template.prepick
-                        for origin in detection.event.origins:
-                            origin.time += template.prepick
-                        family.detections.append(detection)
+                # Shift by integer nanoseconds, as UTCDateTime addition does.
+                prepick_ns = int(round(template.prepick * 1e9))
+                for detection in template_detections.get(template.name, []):
+                    for pick in detection.event.picks:
+                        pick.time = UTCDateTime(ns=pick.time.ns + prepick_ns)
+                    for origin in detection.event.origins:
+                        origin.time = UTCDateTime(
+                            ns=origin.time.ns + prepick_ns)
+                    family.detections.append(detection)
                 party += family
     return party
 
@@ -251,7 +269,9 @@ def _group_process(template_group, parallel, cores, stream, daylong,
     :type template_group: list
     :param template_group: List of Templates.
     :type parallel: bool
-    :param parallel: Whether to use parallel processing or not
+    :param parallel:
+        Whether to use parallel processing or not. If there is more than one
+        chunk, chunks are processed in parallel, otherwise traces are.
     :type cores: int
     :param cores: Number of cores to use, can be False to use all available.
     :type stream: :class:`obspy.core.stream.Stream`
@@ -285,6 +305,8 @@ def _group_process(template_group, parallel, cores, stream, daylong,
     # Processing always needs to be run to account for gaps - pre-process will
     # check whether filtering and resampling needs to be done.
     process_length = master.process_length
+    starttime = min(tr.stats.starttime for tr in stream)
+    endtime = max(tr.stats.endtime for tr in stream)
     if daylong:
         if not master.process_length == 86400:
             Logger.warning(
@@ -294,18 +316,13 @@ def _group_process(template_group, parallel, cores, stream, daylong,
         process_length = 86400
         # Check that data all start on the same day, otherwise strange
         # things will happen...
-        starttimes = [tr.stats.starttime.date for tr in stream]
-        if not len(list(set(starttimes))) == 1:
+        if len({tr.stats.starttime.date for tr in stream}) > 1:
             Logger.warning('Data start on different days, setting to last day')
             starttime = UTCDateTime(
-                stream.sort(['starttime'])[-1].stats.starttime.date)
-        else:
-            starttime = stream.sort(['starttime'])[0].stats.starttime
+                max(tr.stats.starttime for tr in stream).date)
     else:
         # We want to use shortproc to allow overlaps
         func = shortproc
-        starttime = stream.sort(['starttime'])[0].stats.starttime
-    endtime = stream.sort(['endtime'])[-1].stats.endtime
     data_len_samps = round((endtime - starttime) * master.samp_rate) + 1
     assert overlap < process_length, "Overlap must be less than process length"
     chunk_len_samps = (process_length - overlap) * master.samp_rate
@@ -313,70 +330,105 @@ def _group_process(template_group, parallel, cores, stream, daylong,
     Logger.info(f"Splitting these data in {n_chunks} chunks")
     if n_chunks == 0:
         Logger.error('Data must be process_length or longer, not computing')
+    # Raw data are not resampled yet, so work out the chunk length for
+    # each sampling-rate present.
+    chunk_npts = {
+        sampling_rate: int(process_length * sampling_rate)
+        for sampling_rate in {tr.stats.sampling_rate for tr in stream}}
     _endtime = starttime
+    chunks = []
     for i in range(n_chunks):
-        kwargs.update(
+        chunk_kwargs = kwargs.copy()
+        chunk_kwargs.update(
             {'starttime': starttime + (i * (process_length - overlap))})
         if not daylong:
-            _endtime = kwargs['starttime'] + process_length
-            kwargs.update({'endtime': _endtime})
+            _endtime = chunk_kwargs['starttime'] + process_length
+            chunk_kwargs.update({'endtime': _endtime})
         else:
-            _endtime = kwargs['starttime'] + 86400
-        chunk_stream = stream.slice(starttime=kwargs['starttime'],
-                                    endtime=_endtime).copy()
-        Logger.debug(f"Processing chunk {i} between {kwargs['starttime']} "
-                     f"and {_endtime}")
+            _endtime = chunk_kwargs['starttime'] + 86400
+        # Slice gives views into the input data, copy once we know what we
+        # will actually process.
+        chunk_stream = stream.slice(starttime=chunk_kwargs['starttime'],
+                                    endtime=_endtime)
+        Logger.debug(f"Processing chunk {i} between "
+                     f"{chunk_kwargs['starttime']} and {_endtime}")
         if len(chunk_stream) == 0:
             Logger.warning(
-                f"No data between {kwargs['starttime']} and {_endtime}")
+                f"No data between {chunk_kwargs['starttime']} and {_endtime}")
             continue
         for tr in chunk_stream:
-            tr.data = tr.data[0:int(
-                process_length * tr.stats.sampling_rate)]
-        _chunk_stream_lengths = {
-            tr.id: tr.stats.endtime - tr.stats.starttime
-            for tr in chunk_stream}
-        for tr_id, chunk_length in _chunk_stream_lengths.items():
+            tr.data = tr.data[0:chunk_npts[tr.stats.sampling_rate]]
+        if not ignore_length:
             # Remove traces that are too short.
-            if not ignore_length and chunk_length <= .8 * process_length:
-                tr = chunk_stream.select(id=tr_id)[0]
-                chunk_stream.remove(tr)
+            _chunk_traces = []
+            for tr in chunk_stream:
+                if tr.stats.endtime - tr.stats.starttime > .8 * process_length:
+                    _chunk_traces.append(tr)
+                    continue
                 Logger.warning(
                     "Data chunk on {0} starting {1} and ending {2} is "
                     "below 80% of the requested length, will not use"
                     " this.".format(
                         tr.id, tr.stats.starttime, tr.stats.endtime))
+            chunk_stream.traces = _chunk_traces
         if len(chunk_stream) > 0:
-            Logger.debug(
-                f"Processing chunk:\n{chunk_stream.__str__(extended=True)}")
-            _processed_stream = func(st=chunk_stream, **kwargs)
-            # If data have more zeros then pre-processing will return a
-            # trace of 0 length
-            _processed_stream.traces = [
-                tr for tr in _processed_stream if tr.stats.npts != 0]
-            if len(_processed_stream) == 0:
-                Logger.warning(
-                    f"Data quality insufficient between {kwargs['starttime']}"
-                    f" and {_endtime}")
-                continue
-            # Pre-procesing does additional checks for zeros - we need to check
-            # again whether we actually have something useful from this.
-            processed_chunk_stream_lengths = [
-                tr.stats.endtime - tr.stats.starttime
-                for tr in _processed_stream]
-            if min(processed_chunk_stream_lengths) >= .8 * process_length:
-                processed_streams.append(_processed_stream)
-            else:
-                Logger.warning(
-                    f"Data quality insufficient between {kwargs['starttime']}"
-                    f" and {_endtime}")
-                continue
+            if Logger.isEnabledFor(logging.DEBUG):
+                Logger.debug(f"Processing chunk:\n"
+                             f"{chunk_stream.__str__(extended=True)}")
+            chunks.append((chunk_kwargs, _endtime, chunk_stream))
+    if parallel and len(chunks) > 1:
+        # Chunks are independent, so process them concurrently rather than
+        # spreading the traces of each chunk over processes.
+        num_cores = min(cores or cpu_count(), len(chunks))
+        Logger.info(f"Processing {len(chunks)} chunks using {num_cores} "
+                    f"processes")
+        pool = Pool(processes=num_cores)
+        results = [
+            pool.apply_async(func, kwds=dict(
+                chunk_kwargs, st=chunk_stream, parallel=False))
+            for chunk_kwargs, _, chunk_stream in chunks]
+        pool.close()
+        try:
+            processed_chunks = [p.get() for p in results]
+        except KeyboardInterrupt as e:  # pragma: no cover
+            pool.terminate()
+            raise e
+        pool.join()
+    else:
+        # Pre-processing works in place, so take a copy to leave the input
+        # stream intact.
+        processed_chunks = (
+            func(st=chunk_stream.copy(), **chunk_kwargs)
+            for chunk_kwargs, _, chunk_stream in chunks)
+    for (chunk_kwargs, chunk_endtime, _), _processed_stream in zip(
+            chunks, processed_chunks):
+        # If data have more zeros then pre-processing will return a
+        # trace of 0 length
+        _processed_stream.traces = [
+            tr for tr in _processed_stream if tr.stats.npts != 0]
+        if len(_processed_stream) == 0:
+            Logger.warning(
+                f"Data quality insufficient between "
+                f"{chunk_kwargs['starttime']} and {chunk_endtime}")
+            continue
+        # Pre-procesing does additional checks for zeros - we need to check
+        # again whether we actually have something useful from this.
+        processed_chunk_stream_lengths = [
+            tr.stats.endtime - tr.stats.starttime
+            for tr in _processed_stream]
+        if min(processed_chunk_stream_lengths) >= .8 * process_length:
+            processed_streams.append(_processed_stream)
+        else:
+            Logger.warning(
+                f"Data quality insufficient between "
+                f"{chunk_kwargs['starttime']} and {chunk_endtime}")
+            continue
 
-    if _endtime < stream[0].stats.endtime:
+    if _endtime < endtime:
         Logger.warning(
             "Last bit of data between {0} and {1} will go unused "
             "because it is shorter than a chunk of {2} s".format(
-                _endtime, stream[0].stats.endtime, process_length))
+                _endtime, endtime, process_length))
     return processed_streams
 
 
@@ -474,7 +526,9 @@ def match_filter(template_names, template_list, st, threshold,
         Whether to copy data to keep it safe, otherwise will edit your
         templates and stream in place.
     :type export_cccsums: bool
-    :param export_cccsums: Whether to save the cross-correlation statistic.
+    :param export_cccsums:
+        Whether to save the cross-correlation statistic. Correlation sums
+        are handled, and saved, as 32-bit floats.
 
 
     .. Note::
@@ -632,8 +686,7 @@ def match_filter(template_names, template_list, st, threshold,
         if not isinstance(st, Stream):
             msg = 'st must be of type: obspy.core.stream.Stream'
             raise MatchFilterError(msg)
-        if str(threshold_type) not in [str('MAD'), str('absolute'),
-                                       str('av_chan_corr')]:
+        if threshold_type not in ('MAD', 'absolute', 'av_chan_corr'):
             msg = 'threshold_type must be one of: MAD, absolute, av_chan_corr'
             raise MatchFilterError(msg)
         for tr in st:
@@ -676,15 +729,18 @@ def match_filter(template_names, template_list, st, threshold,
     if len(templates) == 0:
         raise IndexError("No matching data")
     Logger.info('Starting the correlation run for these data')
-    for template in templates:
-        Logger.debug(template.__str__())
-    Logger.debug(stream.__str__())
+    if Logger.isEnabledFor(logging.DEBUG):
+        for template in templates:
+            Logger.debug(template.__str__())
+        Logger.debug(stream.__str__())
     multichannel_normxcorr = get_stream_xcorr(xcorr_func, concurrency)
     outtic = default_timer()
     [cccsums, no_chans, chans] = multichannel_normxcorr(
         templates=templates, stream=stream, cores=cores, **kwargs)
     if len(cccsums[0]) == 0:
         raise MatchFilterError('Correlation has not run, zero length cccsum')
+    # Single precision is ample for peak finding - no copy if already float32
+    cccsums = np.asarray(cccsums, dtype=np.float32)
     outtoc = default_timer()
     Logger.info('Looping over templates and streams took: {0:.4f}s'.format(
         outtoc - outtic))
@@ -696,13 +752,24 @@ def match_filter(template_names, template_list, st, threshold,
     detections = []
     if output_cat:
         det_cat = Catalog()
-    if str(threshold_type) == str("absolute"):
-        thresholds = [threshold for _ in range(len(cccsums))]
-    elif str(threshold_type) == str('MAD'):
-        thresholds = [threshold * np.median(np.abs(cccsum))
-                      for cccsum in cccsums]
+    if threshold_type == "absolute":
+        thresholds = [threshold] * len(cccsums)
+    elif threshold_type == 'MAD':
+        # Compute the medians for blocks of templates at once, re-using one
+        # bounded scratch array for the absolute values.
+        block_size = min(max(2 ** 24 // len(cccsums[0]), 1), len(cccsums))
+        scratch = np.empty((block_size, len(cccsums[0])), dtype=np.float32)
+        thresholds = []
+        for i in range(0, len(cccsums), block_size):
+            block = scratch[0: len(cccsums[i: i + block_size])]
+            np.abs(cccsums[i: i + block_size], out=block)
+            mads = np.median(block, axis=1, overwrite_input=True)
+            thresholds.extend(
+                (threshold * mads.astype(np.float64)).tolist())
+        del scratch
     else:
-        thresholds = [threshold * no_chans[i] for i in range(len(cccsums))]
+        thresholds = (
+            threshold * np.asarray(no_chans, dtype=np.float64)).tolist()
     if peak_cores is None:
         peak_cores = cores
     outtic = default_timer()
@@ -712,43 +779,68 @@ def match_filter(template_names, template_list, st, threshold,
         full_peaks=full_peaks, cores=peak_cores)
     outtoc = default_timer()
     Logger.info("Finding peaks took {0:.4f}s".format(outtoc - outtic))
-    for i, cccsum in enumerate(cccsums):
-        if export_cccsums:
-            fname = (f"{_template_names[i]}-{stream[0].stats.starttime}-"
-                     f"{stream[0].stats.endtime}_cccsum.npy")
-            np.save(file=fname, arr=cccsum)
+    # Write in the background while detections are made
+    io_pool = ThreadPool(processes=1) if export_cccsums else None
+    saves = []
+    # These do not change between templates
+    check_mean = Logger.isEnabledFor(logging.DEBUG)
+    make_events = output_cat or output_event
+    sampling_rate = stream[0].stats.sampling_rate
+    starttime = stream[0].stats.starttime
+    try:
+        for i, (cccsum, peaks, template_name, template, template_chans,
+                template_no_chans, template_threshold) in enumerate(zip(
+                    cccsums, all_peaks, _template_names, templates, chans,
+                    no_chans, thresholds)):
+            if export_cccsums:
+                fname = (f"{template_name}-{stream[0].stats.starttime}-"
+                         f"{stream[0].stats.endtime}_cccsum.npy")
+                saves.append((fname, io_pool.apply_async(
+                    np.save, kwds=dict(file=fname, arr=cccsum))))
+            # Sanity check is a full pass over the cccsum - only run it when
+            # debugging
+            if check_mean and np.abs(np.mean(cccsum)) > 0.05:
+                Logger.warning('Mean is not zero!  Check this!')
+            # Set up a trace object for the cccsum as this is easier to plot
+            # and maintains timing
+            if plot:
+                _match_filter_plot(
+                    stream=stream, cccsum=cccsum,
+                    template_names=_template_names,
+                    rawthresh=template_threshold, plotdir=plotdir,
+                    plot_format=plot_format, i=i)
+            if peaks:
+                Logger.debug("Found {0} peaks for template {1}".format(
+                    len(peaks), template_name))
+                offsets = (np.asarray(peaks)[:, 1] / sampling_rate).tolist()
+                for peak, offset in zip(peaks, offsets):
+                    detecttime = starttime + offset
+                    detection = Detection(
+                        template_name=template_name, detect_time=detecttime,
+                        no_chans=template_no_chans, detect_val=peak[0],
+                        threshold=template_threshold, typeofdet='corr',
+                        chans=template_chans, threshold_type=threshold_type,
+                        threshold_input=threshold)
+                    if make_events:
+                        detection._calculate_event(template_st=template)
+                    detections.append(detection)
+                    if output_cat:
+                        det_cat.append(detection.event)
+            else:
+                Logger.debug("Found 0 peaks for template {0}".format(
+                    template_name))
+        Logger.info("Made {0} detections from {1} templates".format(
+            len(detections), len(templates)))
+        for fname, save in saves:
+            save.get()
             Logger.info(f"Saved correlation statistic to {fname}")
-        if np.abs(np.mean(cccsum)) > 0.05:
-            Logger.warning('Mean is not zero!  Check this!')
-        # Set up a trace object for the cccsum as this is easier to plot and
-        # maintains timing
-        if plot:
-            _match_filter_plot(
-                stream=stream, cccsum=cccsum, template_names=_template_names,
-                rawthresh=thresholds[i], plotdir=plotdir,
-                plot_format=plot_format, i=i)
-        if all_peaks[i]:
-            Logger.debug("Found {0} peaks for template {1}".format(
-                len(all_peaks[i]), _template_names[i]))
-            for peak in all_peaks[i]:
-                detecttime = (
-                    stream[0].stats.starttime +
-                    peak[1] / stream[0].stats.sampling_rate)
-                detection = Detection(
-                    template_name=_template_names[i], detect_time=detecttime,
-                    no_chans=no_chans[i], detect_val=peak[0],
-                    threshold=thresholds[i], typeofdet='corr', chans=chans[i],
-                    threshold_type=threshold_type, threshold_input=threshold)
-                if output_cat or output_event:
-                    detection._calculate_event(template_st=templates[i])
-                detections.append(detection)
-                if output_cat:
-                    det_cat.append(detection.event)
-        else:
-            Logger.debug("Found 0 peaks for template {0}".format(
-                _template_names[i]))
-    Logger.info("Made {0} detections from {1} templates".format(
-        len(detections), len(templates)))
+    finally:
+        if io_pool is not None:
+            io_pool.close()
+            io_pool.join()
+    # cccsums is one contiguous array, so it can only be freed as a whole.
+    # Release it before any waveforms are extracted.
+    del cccsums, cccsum
     if extract_detections:
         detection_streams = extract_from_stream(stream, detections)
     del stream, templates
@@ -92,14 +92,20 @@ class Party(object):
         else:
             raise NotImplementedError(
                 'Ambiguous add, only allowed Party or Family additions.')
+        # Equal templates share a name, so only compare families by name
+        families_by_name = dict()
+        for fam in self.families:
+            families_by_name.setdefault(fam.template.name, []).append(fam)
         for oth_fam in families:
             added = False
-            for fam in self.families:
+            for fam in families_by_name.get(oth_fam.template.name, []):
                 if fam.template == oth_fam.template:
                     fam += oth_fam
                     added = True
             if not added:
                 self.families.append(oth_fam)
+                families_by_name.setdefault(
+                    oth_fam.template.name, []).append(oth_fam)
         return self
 
     def __add__(self, other):
@@ -745,7 +751,7 @@ class Party(object):
                     name = family.template.name + '_detections.csv'
                     name_to_write = join(temp_dir, name)
                     _write_family(family=family, filename=name_to_write)
-                with tarfile.open(filename, "w:gz") as tar:
+                with tarfile.open(filename, "w:gz", compresslevel=6) as tar:
                     tar.add(temp_dir, arcname=os.path.basename(filename))
         else:
             Logger.warning('Writing only the catalog component, metadata '
@@ -687,22 +687,26 @@ def group_templates(templates):
     :type templates: List of Tribe of Templates
     :return: List of Lists of Templates.
     """
-    template_groups = []
-    for master in templates:
-        for group in template_groups:
-            if master in group:
-                break
-        else:
-            new_group = [master]
-            for slave in templates:
-                if master.same_processing(slave) and master != slave:
-                    new_group.append(slave)
-            template_groups.append(new_group)
-    # template_groups will contain an empty first list
-    for group in template_groups:
-        if len(group) == 0:
-            template_groups.remove(group)
-    return template_groups
+    template_groups = {}
+    for template in templates:
+        group = template_groups.setdefault(_processing_key(template), [])
+        # Duplicates of the first template in a group are not included
+        if len(group) and template == group[0]:
+            continue
+        group.append(template)
+    return list(template_groups.values())
+
+
+def _processing_key(template):
+    """
+    Get a hashable key of the processing parameters of a template.
+
+    Templates with the same key are processed the same, see
+    :meth:`eqcorrscan.core.match_filter.Template.same_processing`.
+    """
+    return tuple(sorted(
+        (key, value) for key, value in template.__dict__.items()
+        if key not in ['name', 'st', 'prepick', 'event', 'template_info']))
 
 
 if __name__ == "__main__":
@@ -19,6 +19,10 @@ import shutil
 import tarfile
 import tempfile
 import logging
+import math
+import random
+import time
+from multiprocessing.pool import ThreadPool
 
 import numpy as np
 from obspy import Catalog, Stream, read, read_events
@@ -67,6 +71,11 @@ class Tribe(object):
         """
         Add two Tribes or a Tribe and a Template together. '+'
 
+        .. note::
+            The new Tribe holds the same Template objects as the inputs
+            (as with '+='); use :meth:`copy` if you need independent
+            templates.
+
         .. rubric:: Example
 
         >>> tribe = Tribe(templates=[Template(name='a')])
@@ -77,7 +86,7 @@ class Tribe(object):
         >>> print(tribe_abc)
         Tribe of 3 templates
         """
-        return self.copy().__iadd__(other)
+        return Tribe(templates=self.templates).__iadd__(other)
 
     def __iadd__(self, other):
         """
@@ -114,7 +123,16 @@ class Tribe(object):
         >>> tribe_a == tribe_a
         True
         """
-        if self.sort().templates != other.sort().templates:
+        if len(self.templates) != len(other.templates):
+            return False
+        # Compare sorted copies to leave the order of both tribes alone
+        self_templates = sorted(self.templates, key=lambda t: t.name)
+        other_templates = sorted(other.templates, key=lambda t: t.name)
+        # Names are cheap to check, comparing templates compares their data
+        if [t.name for t in self_templates] != [
+                t.name for t in other_templates]:
+            return False
+        if self_templates != other_templates:
             return False
         return True
 
@@ -148,8 +166,11 @@ class Tribe(object):
     def __iter__(self):
         """
         Iterator for the Tribe.
+
+        Iterates over the templates list itself, take a copy if you need to
+        edit `Tribe.templates` in place while iterating.
         """
-        return list(self.templates).__iter__()
+        return self.templates.__iter__()
 
     def __getitem__(self, index):
         """
@@ -175,13 +196,11 @@ class Tribe(object):
         elif isinstance(index, int):
             return self.templates.__getitem__(index)
         else:
-            _index = [i for i, t in enumerate(self.templates)
-                      if t.name == index]
-            try:
-                return self.templates.__getitem__(_index[0])
-            except IndexError:
-                Logger.warning('Template: %s not in tribe' % index)
-                return []
+            for template in self.templates:
+                if template.name == index:
+                    return template
+            Logger.warning('Template: %s not in tribe' % index)
+            return []
 
     def sort(self):
         """
@@ -226,7 +245,10 @@ class Tribe(object):
          filter order: None;
          process length: None s
         """
-        return [t for t in self.templates if t.name == template_name][0]
+        for template in self.templates:
+            if template.name == template_name:
+                return template
+        raise IndexError('Template: %s not in tribe' % template_name)
 
     def remove(self, template):
         """
@@ -242,7 +264,11 @@ class Tribe(object):
         >>> tribe.remove(tribe.templates[0])
         Tribe of 2 templates
         """
-        self.templates = [t for t in self.templates if t != template]
+        # Check identity and names before comparing template data
+        self.templates = [
+            t for t in self.templates
+            if t is not template and (t.name != template.name or
+                                      t != template)]
         return self
 
     def copy(self):
@@ -311,7 +337,9 @@ class Tribe(object):
             if not filename.endswith(".tgz"):
                 Logger.info("Appending '.tgz' to filename.")
                 filename += ".tgz"
-            with tarfile.open(filename, "w:gz") as tar:
+            # Level 6 (the gzip default) is several times faster than
+            # tarfile's default of 9, for slightly larger archives.
+            with tarfile.open(filename, "w:gz", compresslevel=6) as tar:
                 tar.add(dirname, arcname=os.path.basename(dirname))
             shutil.rmtree(dirname)
         return self
@@ -324,13 +352,13 @@ class Tribe(object):
         :param dirname: Directory to write the parameter file to.
         """
         filename = dirname + '/' + 'template_parameters.csv'
+        lines = [
+            ''.join('{0}: {1}, '.format(key, value)
+                    for key, value in template.__dict__.items()
+                    if key not in ['st', 'event']) + '\n'
+            for template in self.templates]
         with open(filename, 'w') as parfile:
-            for template in self.templates:
-                for key in template.__dict__.keys():
-                    if key not in ['st', 'event']:
-                        parfile.write(key + ': ' +
-                                      str(template.__dict__[key]) + ', ')
-                parfile.write('\n')
+            parfile.write(''.join(lines))
         return self
 
     def read(self, filename):
@@ -365,31 +393,34 @@ class Tribe(object):
         :param dirname: Folder to read from.
         """
         templates = _par_read(dirname=dirname, compressed=False)
-        t_files = glob.glob(dirname + os.sep + '*.ms')
+        t_files = {os.path.basename(t_file): t_file
+                   for t_file in glob.glob(dirname + os.sep + '*.ms')}
         tribe_cat_file = glob.glob(os.path.join(dirname, "tribe_cat.*"))
         if len(tribe_cat_file) != 0:
             tribe_cat = read_events(tribe_cat_file[0])
         else:
             tribe_cat = Catalog()
-        previous_template_names = [t.name for t in self.templates]
+        # Look up events by comment, the last matching event is used.
+        comment_events = {
+            comment.text: event
+            for event in tribe_cat for comment in event.comments}
+        previous_template_names = {t.name for t in self.templates}
+        read_templates = []
         for template in templates:
             if template.name in previous_template_names:
                 # Don't read in for templates that we already have.
+                read_templates.append(template)
                 continue
-            for event in tribe_cat:
-                for comment in event.comments:
-                    if comment.text == 'eqcorrscan_template_' + template.name:
-                        template.event = event
-            t_file = [t for t in t_files
-                      if t.split(os.sep)[-1] == template.name + '.ms']
-            if len(t_file) == 0:
+            event = comment_events.get('eqcorrscan_template_' + template.name)
+            if event is not None:
+                template.event = event
+            t_file = t_files.get(template.name + '.ms')
+            if t_file is None:
                 Logger.error('No waveform for template: ' + template.name)
-                templates.remove(template)
                 continue
-            elif len(t_file) > 1:
-                Logger.warning('Multiple waveforms found, using: ' + t_file[0])
-            template.st = read(t_file[0])
-        self.templates.extend(templates)
+            template.st = read(t_file)
+            read_templates.append(template)
+        self.templates.extend(read_templates)
         return
 
     def cluster(self, method, **kwargs):
@@ -415,11 +446,17 @@ class Tribe(object):
         if method in ['space_cluster', 'space_time_cluster']:
             cat = Catalog([t.event for t in self.templates])
             groups = func(cat, **kwargs)
+            # Equal events share a resource_id, so bucketing on it keeps the
+            # equality lookup to the few templates that could match.
+            by_rid = dict()
+            for t in self.templates:
+                by_rid.setdefault(str(t.event.resource_id), []).append(t)
             for group in groups:
                 new_tribe = Tribe()
                 for event in group:
-                    new_tribe.templates.extend([t for t in self.templates
-                                                if t.event == event])
+                    new_tribe.templates.extend(
+                        [t for t in by_rid.get(str(event.resource_id), [])
+                         if t.event == event])
                 tribes.append(new_tribe)
         return tribes
 
@@ -589,10 +626,11 @@ class Tribe(object):
             raise NotImplementedError(
                 "Inconsistent template processing and pre-processed data - "
                 "something is wrong!")
-        # now we can compute the detections for each group
+        # now we can compute the detections for each group, _group_detect
+        # leaves the stream intact so there is no need to copy it.
         for group in template_groups:
             group_party = _group_detect(
-                templates=group, stream=stream.copy(), threshold=threshold,
+                templates=group, stream=stream, threshold=threshold,
                 threshold_type=threshold_type, trig_int=trig_int,
                 plot=plot, group_size=group_size, pre_processed=pre_processed,
                 daylong=daylong, parallel_process=parallel_process,
@@ -657,6 +695,10 @@ class Tribe(object):
             over other methods.
         :type parallel_process: bool
         :param parallel_process:
+            Whether to pre-process the data in parallel. The next chunk of
+            data is only downloaded in the background while detecting when
+            this is False and concurrency is not 'multiprocess', because
+            those options fork processes.
         :type xcorr_func: str or callable
         :param xcorr_func:
             A str of a registered xcorr function or a callable for implementing
@@ -701,7 +743,9 @@ class Tribe(object):
         :type retries: int
         :param retries:
             Number of attempts allowed for downloading - allows for transient
-            server issues.
+            server issues. Failed attempts are retried after an exponentially
+            increasing delay (1, 2, 4... s, capped at 60 s, plus up to 1 s of
+            jitter).
 
         :return:
             :class:`eqcorrscan.core.match_filter.Party` of Families of
@@ -773,49 +817,25 @@ class Tribe(object):
         data_length = max([t.process_length for t in self.templates])
         pad = 0
         for template in self.templates:
-            max_delay = (template.st.sort(['starttime'])[-1].stats.starttime -
-                         template.st.sort(['starttime'])[0].stats.starttime)
-            if max_delay > pad:
-                pad = max_delay
+            starts = [tr.stats.starttime for tr in template.st]
+            pad = max(pad, max(starts) - min(starts))
         download_groups = int(endtime - starttime) / data_length
-        template_channel_ids = []
-        for template in self.templates:
-            for tr in template.st:
-                if tr.stats.network not in [None, '']:
-                    chan_id = (tr.stats.network,)
-                else:
-                    chan_id = ('*',)
-                if tr.stats.station not in [None, '']:
-                    chan_id += (tr.stats.station,)
-                else:
-                    chan_id += ('*',)
-                if tr.stats.location not in [None, '']:
-                    chan_id += (tr.stats.location,)
-                else:
-                    chan_id += ('*',)
-                if tr.stats.channel not in [None, '']:
-                    if len(tr.stats.channel) == 2:
-                        chan_id += (tr.stats.channel[0] + '?' +
-                                    tr.stats.channel[-1],)
-                    else:
-                        chan_id += (tr.stats.channel,)
-                else:
-                    chan_id += ('*',)
-                template_channel_ids.append(chan_id)
-        template_channel_ids = list(set(template_channel_ids))
+        # De-duplicate keeping the order so that bulk requests are repeatable
+        template_channel_ids = list(dict.fromkeys(
+            _bulk_channel_id(tr.stats)
+            for template in self.templates for tr in template.st))
         if return_stream:
             stream = Stream()
-        if int(download_groups) < download_groups:
-            download_groups = int(download_groups) + 1
-        else:
-            download_groups = int(download_groups)
-        for i in range(download_groups):
-            bulk_info = []
-            for chan_id in template_channel_ids:
-                bulk_info.append((
-                    chan_id[0], chan_id[1], chan_id[2], chan_id[3],
-                    starttime + (i * data_length) - (pad + buff),
-                    starttime + ((i + 1) * data_length) + (pad + buff)))
+        download_groups = math.ceil(download_groups)
+
+        def _download_group(i):
+            """ Download, clean and trim data for group i. """
+            download_start = starttime + (i * data_length) - (pad + buff)
+            download_end = starttime + ((i + 1) * data_length) + (pad + buff)
+            bulk_info = [
+                (chan_id[0], chan_id[1], chan_id[2], chan_id[3],
+                 download_start, download_end)
+                for chan_id in template_channel_ids]
             for retry_attempt in range(retries):
                 try:
                     Logger.info("Downloading data")
@@ -841,7 +861,12 @@ class Tribe(object):
                         break
                 except Exception as e:
                     Logger.error(e)
-                    continue
+                if retry_attempt < retries - 1:
+                    # Back off with jitter to give the server time to recover
+                    delay = min(2 ** retry_attempt, 60) + random.uniform(0, 1)
+                    Logger.info(
+                        "Retrying download in {0:.1f} s".format(delay))
+                    time.sleep(delay)
             else:
                 raise MatchFilterError(
                     "Could not download data after {0} attempts".format(
@@ -851,60 +876,86 @@ class Tribe(object):
                 gaps = st.get_gaps(min_gap=min_gap)
                 if len(gaps) > 0:
                     Logger.warning("Large gaps in downloaded data")
-                    st.merge()
-                    gappy_channels = list(
-                        set([(gap[0], gap[1], gap[2], gap[3])
-                             for gap in gaps]))
-                    _st = Stream()
-                    for tr in st:
-                        tr_stats = (tr.stats.network, tr.stats.station,
-                                    tr.stats.location, tr.stats.channel)
-                        if tr_stats in gappy_channels:
-                            Logger.warning(
-                                "Removing gappy channel: {0}".format(tr))
-                        else:
-                            _st += tr
-                    st = _st
-                    st.split()
+                    gappy_channels = {
+                        (gap[0], gap[1], gap[2], gap[3]) for gap in gaps}
+                    for gappy_channel in sorted(gappy_channels):
+                        Logger.warning("Removing gappy channel: {0}".format(
+                            '.'.join(gappy_channel)))
+                    # Leave the kept traces unmerged, as when min_gap is not
+                    # set, so that short gaps do not reach detrend masked.
+                    st = Stream(traces=[
+                        tr for tr in st
+                        if (tr.stats.network, tr.stats.station,
+                            tr.stats.location, tr.stats.channel)
+                        not in gappy_channels])
             st.detrend("simple").merge()
             st.trim(starttime=starttime + (i * data_length) - pad,
                     endtime=starttime + ((i + 1) * data_length) + pad)
+            kept = []
             for tr in st:
-                if not _check_daylong(tr):
-                    st.remove(tr)
-                    Logger.warning(
-                        "{0} contains more zeros than non-zero, "
-                        "removed".format(tr.id))
-            for tr in st:
+                # Check the length first, it is cheaper than scanning data
                 if tr.stats.endtime - tr.stats.starttime < \
-                   0.8 * data_length:
-                    st.remove(tr)
+                        0.8 * data_length:
                     Logger.warning(
                         "{0} is less than 80% of the required length"
                         ", removed".format(tr.id))
-            if return_stream:
-                stream += st
-            try:
-                party += self.detect(
-                    stream=st, threshold=threshold,
-                    threshold_type=threshold_type, trig_int=trig_int,
-                    plot=plot, plotdir=plotdir, daylong=daylong,
-                    parallel_process=parallel_process, xcorr_func=xcorr_func,
-                    concurrency=concurrency, cores=cores,
-                    ignore_length=ignore_length,
-                    ignore_bad_data=ignore_bad_data, group_size=group_size,
-                    overlap=None, full_peaks=full_peaks,
-                    process_cores=process_cores, **kwargs)
-                if save_progress:
-                    party.write("eqcorrscan_temporary_party")
-            except Exception as e:
-                Logger.critical(
-                    'Error, routine incomplete, returning incomplete Party')
-                Logger.error('Error: {0}'.format(e))
-                if return_stream:
-                    return party, stream
+                elif not _check_daylong(tr):
+                    Logger.warning(
+                        "{0} contains more zeros than non-zero, "
+                        "removed".format(tr.id))
+                else:
+                    kept.append(tr)
+            st.traces = kept
+            return st
+
+        # Download the next group of data while the current one is being
+        # correlated, only keeping one group in hand at a time. Processing
+        # in parallel or correlating with "multiprocess" forks processes,
+        # which must not happen while a download thread is running, so
+        # download in the main thread in those cases.
+        prefetch = not parallel_process and concurrency != "multiprocess"
+        download_pool = ThreadPool(1) if prefetch else None
+        try:
+            if prefetch and download_groups:
+                next_st = download_pool.apply_async(_download_group, (0, ))
+            for i in range(download_groups):
+                if prefetch:
+                    st = next_st.get()
+                    if i + 1 < download_groups:
+                        next_st = download_pool.apply_async(
+                            _download_group, (i + 1, ))
                 else:
-                    return party
+                    st = _download_group(i)
+                if return_stream:
+                    stream += st
+                try:
+                    party += self.detect(
+                        stream=st, threshold=threshold,
+                        threshold_type=threshold_type, trig_int=trig_int,
+                        plot=plot, plotdir=plotdir, daylong=daylong,
+                        parallel_process=parallel_process,
+                        xcorr_func=xcorr_func, concurrency=concurrency,
+                        cores=cores, ignore_length=ignore_length,
+                        ignore_bad_data=ignore_bad_data,
+                        group_size=group_size, overlap=None,
+                        full_peaks=full_peaks, process_cores=process_cores,
+                        **kwargs)
+                    if save_progress:
+                        party.write("eqcorrscan_temporary_party")
+                except Exception as e:
+                    Logger.critical(
+                        'Error, routine incomplete, returning incomplete '
+                        'Party')
+                    Logger.error('Error: {0}'.format(e))
+                    if return_stream:
+                        return party, stream
+                    else:
+                        return party
+        finally:
+            if download_pool is not None:
+                # Waits for any download still in flight
+                download_pool.terminate()
+                download_pool.join()
         for family in party:
             if family is not None:
                 family.detections = family._uniq().detections
@@ -1029,14 +1080,18 @@ class Tribe(object):
             delayed=delayed, plot=plot, min_snr=min_snr, parallel=parallel,
             num_cores=num_cores, skip_short_chans=skip_short_chans,
             **kwargs)
+        author = getpass.getuser()
         for template, event, process_len in zip(templates, catalog,
                                                 process_lengths):
             t = Template()
+            kept = []
             for tr in template:
                 if not np.any(tr.data.astype(np.float16)):
                     Logger.warning('Data are zero in float16, missing data,'
                                    ' will not use: {0}'.format(tr.id))
-                    template.remove(tr)
+                else:
+                    kept.append(tr)
+            template.traces = kept
             if len(template) == 0:
                 Logger.error('Empty Template')
                 continue
@@ -1052,12 +1107,31 @@ class Tribe(object):
             event.comments.append(Comment(
                 text="eqcorrscan_template_" + t.name,
                 creation_info=CreationInfo(agency='eqcorrscan',
-                                           author=getpass.getuser())))
+                                           author=author)))
             t.event = event
             self.templates.append(t)
         return self
 
 
+def _bulk_channel_id(stats):
+    """
+    Get the (network, station, location, channel) tuple for a bulk request.
+
+    Empty or unset codes are wildcarded, and two-letter channel codes have
+    their missing middle letter wildcarded.
+
+    :type stats: obspy.core.trace.Stats
+    :param stats: Header of the template trace.
+
+    :return: tuple
+    """
+    channel = stats.channel or '*'
+    if len(channel) == 2:
+        channel = channel[0] + '?' + channel[-1]
+    return (stats.network or '*', stats.station or '*',
+            stats.location or '*', channel)
+
+
 def read_tribe(fname):
     """
     Read a Tribe of templates from a tar archive.
@@ -1077,7 +1151,10 @@ if __name__ == "__main__":
     # List files to be removed after doctest
     cleanup = ['test_tribe.tgz']
     for f in cleanup:
-        if os.path.isfile(f):
+        try:
             os.remove(f)
-        elif os.path.isdir(f):
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # Directories can't be removed with os.remove
             shutil.rmtree(f)
@@ -11,13 +11,15 @@ from http.client import IncompleteRead
 
 from obspy import UTCDateTime, Stream
 from obspy.clients.fdsn import Client
+from obspy.core.event import WaveformStreamID
 from obspy.geodetics import gps2dist_azimuth
 
 from eqcorrscan.utils.catalog_to_dd import (
     write_catalog, write_correlations, read_phase, write_event, _DTObs,
-    _EventPair, _generate_event_id_mapper, _make_sparse_event,
-    _prepare_stream, compute_differential_times, _filter_stream,
-    _hypodd_event_str, write_phase, write_station)
+    _EventPair, SparseEvent, SparsePick, _get_seed_id,
+    _generate_event_id_mapper, _make_sparse_event, _prepare_stream,
+    compute_differential_times, _filter_stream, _hypodd_event_str,
+    write_phase, write_station)
 
 
 class TestHelperObjects(unittest.TestCase):
@@ -56,6 +58,39 @@ class TestHelperObjects(unittest.TestCase):
                        weight=1.0, phase="IAML"),
             ]
 
+    def test_sparse_objects_slotted(self):
+        """ Sparse holders should not carry a per-instance __dict__. """
+        pick = SparsePick(tt=1.2, time=UTCDateTime(2019, 1, 1, 0, 0, 1.2),
+                          time_weight=1.0, seed_id="NZ.FOZ.10.HHZ",
+                          phase_hint="P", waveform_id=None)
+        event = SparseEvent(resource_id="test", picks=[pick],
+                            origin_time=UTCDateTime(2019, 1, 1))
+        self.assertEqual(pick.station, "FOZ")
+        self.assertEqual(pick.channel, "HHZ")
+        self.assertFalse(hasattr(pick, "__dict__"))
+        self.assertFalse(hasattr(event, "__dict__"))
+        with self.assertRaises(AttributeError):
+            pick.spurious = "bob"
+
+    def test_sparse_pick_equality(self):
+        kwargs = dict(tt=1.2, time=UTCDateTime(2019, 1, 1, 0, 0, 1.2),
+                      time_weight=1.0, seed_id="NZ.FOZ.10.HHZ",
+                      phase_hint="P", waveform_id=None)
+        pick = SparsePick(**kwargs)
+        self.assertEqual(pick, SparsePick(**kwargs))
+        self.assertEqual(len({pick, SparsePick(**kwargs)}), 1)
+        kwargs.update({"phase_hint": "S"})
+        self.assertNotEqual(pick, SparsePick(**kwargs))
+        self.assertEqual(len({pick, SparsePick(**kwargs)}), 2)
+
+    def test_seed_id_memoized(self):
+        wid_1 = WaveformStreamID(seed_string="NZ.FOZ.10.HHZ")
+        wid_2 = WaveformStreamID(seed_string="NZ.FOZ.10.HHZ")
+        self.assertEqual(_get_seed_id(wid_1), wid_1.get_seed_string())
+        self.assertIs(_get_seed_id(wid_1), _get_seed_id(wid_2))
+        wid_3 = WaveformStreamID(station_code="FOZ")
+        self.assertEqual(_get_seed_id(wid_3), wid_3.get_seed_string())
+
 
 class TestCatalogMethods(unittest.TestCase):
     @classmethod
@@ -39,11 +39,10 @@ class CatalogUtilsTests(unittest.TestCase):
                 self.assertTrue(pick.waveform_id.location_code in locations)
         filtered_catalog = filter_picks(catalog=catalog,
                                         top_n_picks=top_n_picks)
-        filtered_stations = []
-        for event in filtered_catalog:
-            for pick in event.picks:
-                filtered_stations.append(pick.waveform_id.station_code)
-        self.assertEqual(len(list(set(filtered_stations))), top_n_picks)
+        filtered_stations = {
+            pick.waveform_id.station_code
+            for event in filtered_catalog for pick in event.picks}
+        self.assertEqual(len(filtered_stations), top_n_picks)
 
 
 if __name__ == '__main__':
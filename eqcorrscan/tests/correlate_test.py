@@ -606,6 +606,15 @@ class TestArrayCorrelateFunctions:
                 assert len(warning) == 1
                 assert "Low variance found" in warning[-1]
 
+    def test_short_fft_len_uses_blocks(self):
+        """ ensure an fft length shorter than the template falls back to
+        blocks that hold the template rather than the whole stream """
+        assert corr._get_fft_len(200, stream_len) == 2 ** 13
+        assert corr._get_fft_len(200, stream_len, fft_len=2 ** 10) == 2 ** 10
+        fft_len = corr._get_fft_len(10000, stream_len)
+        assert fft_len == next_fast_len(20000)
+        assert fft_len < next_fast_len(10000 + stream_len - 1)
+
 
 @pytest.mark.serial
 class TestStreamCorrelateFunctions:
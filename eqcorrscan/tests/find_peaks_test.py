@@ -100,6 +100,39 @@ class TestDeclustering:
             threshold=0)
         assert len(peaks) == len(peaks_out)
 
+    def test_dist_time_below_threshold_first(self):
+        """ Check events stay matched to peaks when peaks are dropped. """
+        peaks = np.array([0.1, 0.9, 0.8])
+        index = np.array([0, 10, 15])
+        catalog = Catalog([
+            Event(origins=[Origin(latitude=0.0, longitude=80.0, depth=1000.)]),
+            Event(origins=[Origin(latitude=0.0, longitude=90.0, depth=1000.)]),
+            Event(origins=[Origin(latitude=0.0, longitude=90.0, depth=1000.)]),
+        ])
+        peaks_out = decluster_distance_time(
+            peaks, index, trig_int=20, catalog=catalog,
+            hypocentral_separation=10.0, threshold=0.5)
+        assert len(peaks_out) == 1
+        assert peaks_out[0][1] == 10
+        assert peaks_out[0][0] == pytest.approx(0.9)
+
+    @pytest.mark.parametrize("index_range", [500, 10 ** 12])
+    def test_dense_and_sparse_indices(self, index_range):
+        """ Check declustering against a brute-force search. """
+        rng = np.random.default_rng(42)
+        peaks = rng.standard_normal(300).astype(np.float32)
+        index = rng.integers(0, index_range, 300)
+        trig_int = index_range // 100
+        ordered = np.abs(peaks).argsort()[::-1]
+        expected = []
+        for peak, ind in zip(peaks[ordered], index[ordered]):
+            if abs(peak) < 0.5:
+                break
+            if all(abs(ind - kept[1]) > trig_int for kept in expected):
+                expected.append((peak, ind))
+        peaks_out = decluster(peaks, index, trig_int, threshold=0.5)
+        assert peaks_out == expected
+
 
 class TestStandardPeakFinding:
     """ Run peak finding against a standard cc array """
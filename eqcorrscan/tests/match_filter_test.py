@@ -11,7 +11,7 @@ from obspy import read, UTCDateTime, read_events, Catalog, Stream, Trace
 from obspy.clients.fdsn import Client
 from obspy.clients.fdsn.header import FDSNException
 from obspy.clients.earthworm import Client as EWClient
-from obspy.core.event import Pick, Event
+from obspy.core.event import Pick, Event, WaveformStreamID
 from obspy.core.util.base import NamedTemporaryFile
 
 from eqcorrscan.core.match_filter import (
@@ -19,7 +19,7 @@ from eqcorrscan.core.match_filter import (
     write_catalog, extract_from_stream, Tribe, Template, Party, Family,
     read_party, read_tribe, _spike_test)
 from eqcorrscan.core.match_filter.matched_filter import (
-    match_filter, MatchFilterError)
+    match_filter, MatchFilterError, _group_process)
 from eqcorrscan.core.match_filter.helpers import get_waveform_client
 from eqcorrscan.utils import pre_processing, catalog_utils
 from eqcorrscan.utils.correlate import fftw_normxcorr, numpy_normxcorr
@@ -111,6 +111,91 @@ class TestCoreMethods(unittest.TestCase):
         with self.assertRaises(MatchFilterError):
             _spike_test(stream)
 
+    def test_group_process_leaves_input_intact(self):
+        """Check that chunked processing does not change the input data."""
+        stream = Stream([Trace(
+            data=np.random.randn(5000), header=dict(
+                station=sta, channel="HHZ", sampling_rate=20.0))
+            for sta in "ABC"])
+        data_ids = {tr.id: id(tr.data) for tr in stream}
+        data = {tr.id: tr.data.copy() for tr in stream}
+        template = Template(
+            name="a", st=Stream(), lowcut=2., highcut=8., samp_rate=20.,
+            filt_order=4, process_length=100., prepick=0.5)
+        processed = _group_process(
+            template_group=[template], parallel=False, cores=1,
+            stream=stream, daylong=False, ignore_length=False,
+            ignore_bad_data=False, overlap=0.0)
+        self.assertEqual(len(processed), 2)
+        parallel_processed = _group_process(
+            template_group=[template], parallel=True, cores=2,
+            stream=stream, daylong=False, ignore_length=False,
+            ignore_bad_data=False, overlap=0.0)
+        self.assertEqual(processed, parallel_processed)
+        for tr in stream:
+            self.assertEqual(id(tr.data), data_ids[tr.id])
+            self.assertTrue(np.array_equal(tr.data, data[tr.id]))
+
+    def test_group_detect_prepick_applied_once(self):
+        """Check picks are corrected for prepick once across chunks."""
+        random = np.random.RandomState(13)
+        stream = Stream([Trace(
+            data=random.randn(4000), header=dict(
+                station=sta, channel="HHZ", sampling_rate=20.0))
+            for sta in "AB"])
+        wavelet = np.sin(np.linspace(0, 8 * np.pi, 40)) * 20
+        event_samples = [300, 1500, 2700, 3500]
+        for sample in event_samples:
+            for tr in stream:
+                tr.data[sample:sample + 40] += wavelet
+        template_st = stream.slice(
+            stream[0].stats.starttime + 14.5,
+            stream[0].stats.starttime + 16.45).copy()
+        template_st = pre_processing.shortproc(
+            template_st, lowcut=2., highcut=8., filt_order=4, samp_rate=20.)
+        template = Template(
+            name="a", st=template_st, lowcut=2., highcut=8., samp_rate=20.,
+            filt_order=4, process_length=60., prepick=0.5,
+            event=Event(picks=[Pick(
+                time=tr.stats.starttime + 0.5, phase_hint="P",
+                waveform_id=WaveformStreamID(seed_string=tr.id))
+                for tr in template_st]))
+        party = Tribe([template]).detect(
+            stream=stream, threshold=0.8, threshold_type="av_chan_corr",
+            trig_int=2., parallel_process=False, overlap=None)
+        self.assertEqual(len(party[0]), len(event_samples))
+        for detection in party[0]:
+            for pick in detection.event.picks:
+                self.assertAlmostEqual(
+                    pick.time - detection.detect_time, 0.5, places=2)
+
+    def test_tribe_detect_leaves_input_intact(self):
+        """Check that detecting with several groups does not edit data."""
+        random = np.random.RandomState(42)
+        stream = Stream([Trace(
+            data=random.randn(3000), header=dict(
+                station=sta, channel="HHZ", sampling_rate=20.0))
+            for sta in "AB"])
+        data = {tr.id: tr.data.copy() for tr in stream}
+        stats = {tr.id: tr.stats.copy() for tr in stream}
+        templates = []
+        for lowcut in (2., 3.):
+            template_st = pre_processing.shortproc(
+                stream.slice(stream[0].stats.starttime + 20,
+                             stream[0].stats.starttime + 22).copy(),
+                lowcut=lowcut, highcut=8., filt_order=4, samp_rate=20.)
+            templates.append(Template(
+                name=f"low-{lowcut:.0f}", st=template_st, lowcut=lowcut,
+                highcut=8., samp_rate=20., filt_order=4, process_length=60.,
+                prepick=0.5))
+        party = Tribe(templates).detect(
+            stream=stream, threshold=0.9, threshold_type="av_chan_corr",
+            trig_int=2., parallel_process=False, overlap=None)
+        self.assertEqual(len(party), 2)
+        for tr in stream:
+            self.assertTrue(np.array_equal(tr.data, data[tr.id]))
+            self.assertEqual(tr.stats, stats[tr.id])
+
 
 @pytest.mark.serial
 class TestSynthData(unittest.TestCase):
@@ -173,6 +258,35 @@ class TestSynthData(unittest.TestCase):
                      threshold=8, threshold_type='MAD', trig_int=1,
                      plot=False)
 
+    def test_export_cccsums(self):
+        """Check that exported correlation sums are written in full."""
+        stream = Stream(traces=[
+            Trace(data=np.random.randn(1000)),
+            Trace(data=np.random.randn(1000))])
+        templates = [Stream(traces=[Trace(data=np.random.randn(20)),
+                                    Trace(data=np.random.randn(20))])
+                     for _ in range(2)]
+        for st in [stream] + templates:
+            for tr, station in zip(st, 'AB'):
+                tr.stats.sampling_rate = 40
+                tr.stats.station = station
+        template_names = ['export_1', 'export_2']
+        match_filter(template_names=template_names, template_list=templates,
+                     st=stream, threshold=8, threshold_type='MAD',
+                     trig_int=1, plot=False, export_cccsums=True)
+        fnames = [f"{name}-{stream[0].stats.starttime}-"
+                  f"{stream[0].stats.endtime}_cccsum.npy"
+                  for name in template_names]
+        try:
+            for fname in fnames:
+                cccsum = np.load(fname)
+                self.assertEqual(len(cccsum), 1000 - 20 + 1)
+                self.assertTrue(np.all(np.isfinite(cccsum)))
+        finally:
+            for fname in fnames:
+                if os.path.isfile(fname):
+                    os.remove(fname)
+
 
 @pytest.mark.network
 class TestGeoNetCase(unittest.TestCase):
@@ -1081,6 +1195,14 @@ class TestMatchObjectLight(unittest.TestCase):
         self.assertTrue(self.tribe == self.tribe)
         self.assertFalse(self.tribe != self.tribe)
 
+    def test_tribe_equality_keeps_order(self):
+        """Check that comparing tribes does not re-order them."""
+        reordered = Tribe(templates=self.tribe.templates[::-1])
+        names = [t.name for t in reordered]
+        self.assertEqual(reordered, self.tribe)
+        self.assertEqual([t.name for t in reordered], names)
+        self.assertNotEqual(reordered[1:], self.tribe)
+
     def test_tribe_add(self):
         """Test add method"""
         added = self.tribe.copy()
@@ -1089,6 +1211,14 @@ class TestMatchObjectLight(unittest.TestCase):
         added += added[-1]
         self.assertEqual(len(added), 5)
 
+    def test_tribe_add_shares_templates(self):
+        """Check that adding tribes keeps the same templates."""
+        combined = self.tribe[0:2] + self.tribe[2:]
+        self.assertEqual(len(combined), len(self.tribe))
+        for template, original in zip(combined, self.tribe):
+            self.assertIs(template, original)
+        self.assertEqual(len(self.tribe), 4)
+
     def test_tribe_remove(self):
         """Test remove method"""
         removal = self.tribe.copy()
@@ -45,6 +45,17 @@ class TestPreProcessing(unittest.TestCase):
                 3602 * int(self.st[0].stats.sampling_rate)))
         self.assertFalse(_check_daylong(not_daylong))
 
+    def test_daylong_checks_gappy(self):
+        """Test that masked gaps are not counted as data."""
+        tr1 = Trace(np.ones(100))
+        tr2 = Trace(np.ones(100))
+        tr2.stats.starttime += 500
+        # Mostly gap: 200 samples of data in 600
+        gappy = Stream([tr1, tr2]).merge()[0]
+        self.assertTrue(np.ma.is_masked(gappy.data))
+        self.assertEqual(len(gappy.data), 600)
+        self.assertFalse(_check_daylong(gappy))
+
     def test_shortproc(self):
         """Test the short-proc processing method."""
         processed = shortproc(
@@ -27,8 +27,11 @@ _import_map = {
     "catalogue2DD": "catalog_to_dd",
     "EQcorrscan_plotting": "plotting",
 }
+_package_path = __path__[0]
+# Longest first so that the most specific legacy name wins.
+_import_prefixes = tuple(sorted(_import_map, key=len, reverse=True))
 
-_depreciated = ['sfile_util', 'Sfile_util']
+_depreciated = frozenset(['sfile_util', 'Sfile_util'])
 
 
 class EQcorrscanDeprecationWarning(UserWarning):
@@ -43,17 +46,13 @@ class EQcorrscanRestructureAndLoad(object):
     Path finder and module loader for transitioning
     """
     def find_module(self, fullname, path=None):
+        if not fullname.startswith(_import_prefixes):
+            return None
         # Compatibility with namespace paths.
         if hasattr(path, "_path"):
             path = path._path
 
-        if not path or not path[0].startswith(__path__[0]):
-            return None
-
-        for key in _import_map.keys():
-            if fullname.startswith(key):
-                break
-        else:
+        if not path or not path[0].startswith(_package_path):
             return None
         return self
 
@@ -67,12 +66,10 @@ class EQcorrscanRestructureAndLoad(object):
         elif name in _depreciated:
             raise ImportError("sfile_util has moved to obspy.io.nordic")
         else:
-            new_name = name
-            for old, new in _import_map.items():
-                if not new_name.startswith(old):
-                    continue
-                new_name = new_name.replace(old, new)
-                break
+            for old in _import_prefixes:
+                if name.startswith(old):
+                    new_name = name.replace(old, _import_map[old])
+                    break
             else:
                 return None
 
@@ -92,7 +89,8 @@ class EQcorrscanRestructureAndLoad(object):
         return module
 
 
-sys.meta_path.append(EQcorrscanRestructureAndLoad())
+if _import_map:
+    sys.meta_path.append(EQcorrscanRestructureAndLoad())
 
 
 if __name__ == '__main__':
@@ -11,6 +11,8 @@ Functions to generate hypoDD input files from catalogs.
 import numpy as np
 import logging
 from collections import namedtuple, defaultdict, Counter
+from functools import lru_cache
+from operator import attrgetter
 from obspy.core import stream
 from multiprocessing import cpu_count, Pool
 
@@ -30,6 +32,8 @@ SeedPickID = namedtuple("SeedPickID", ["seed_id", "phase_hint"])
 # Some hypoDD specific event holders - classes were faster than named-tuples
 
 class SparseEvent(object):
+    __slots__ = ("resource_id", "picks", "origin_time")
+
     def __init__(self, resource_id, picks, origin_time):
         self.resource_id = resource_id
         self.picks = picks
@@ -42,6 +46,9 @@ class SparseEvent(object):
 
 
 class SparsePick(object):
+    __slots__ = ("tt", "time", "time_weight", "seed_id", "phase_hint",
+                 "waveform_id", "station", "channel")
+
     def __init__(self, tt, time, time_weight, seed_id, phase_hint,
                  waveform_id):
         self.tt = tt
@@ -50,23 +57,58 @@ class SparsePick(object):
         self.seed_id = seed_id
         self.phase_hint = phase_hint
         self.waveform_id = waveform_id
+        # Split once here: station is compared for every pick-pair when
+        # making event pairs.
+        seed_parts = seed_id.split('.')
+        self.station = seed_parts[1]
+        self.channel = seed_parts[-1]
 
     def __repr__(self):
         return ("SparsePick(seed_id={0}, phase_hint={1}, tt={2:.2f}, "
                 "time_weight={3})".format(
                     self.seed_id, self.phase_hint, self.tt, self.time_weight))
 
-    @property
-    def station(self):
-        return self.seed_id.split('.')[1]
+    # Compare and hash by value so that duplicate picks (e.g. from
+    # overlapping catalogs) can be removed with sets. Picks should not be
+    # modified once they are in a set or used as dict keys.
+    def _key(self):
+        # UTCDateTime is explicitly unhashable, use its integer nanoseconds
+        return (self.seed_id, self.phase_hint, self.time.ns, self.tt,
+                self.time_weight)
 
-    @property
-    def channel(self):
-        return self.seed_id.split('.')[-1]
+    def __eq__(self, other):
+        if not isinstance(other, SparsePick):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
 
 
 # Generic helpers
 
+@lru_cache(maxsize=None)
+def _seed_id(network, station, location, channel):
+    """
+    Memoized seed-id: picks on the same channel share a single string.
+
+    Equivalent to WaveformStreamID.get_seed_string.
+    """
+    return "%s.%s.%s.%s" % (
+        network or "", station or "", location or "", channel or "")
+
+
+_waveform_codes = attrgetter(
+    "network_code", "station_code", "location_code", "channel_code")
+
+_pick_fields = attrgetter("time", "waveform_id", "phase_hint", "resource_id")
+
+
+def _get_seed_id(waveform_id):
+    """ Get the (shared) seed-id string for a WaveformStreamID. """
+    return _seed_id(*_waveform_codes(waveform_id))
+
+
 class _DTObs(object):
     """ Holder for phase observations """
 
@@ -148,21 +190,24 @@ def _generate_event_id_mapper(catalog, event_id_mapper=None):
 def _make_sparse_event(event):
     """ Make a sparse event with just the info hypoDD needs. """
     origin_time = (event.preferred_origin() or event.origins[0]).time
+    # Key on the id strings: hashing ResourceIdentifiers goes through
+    # python-level __hash__ and __eq__ for every pick.
     time_weight_dict = {
-        arr.pick_id: arr.time_weight or 1.0 for origin in event.origins
-        for arr in origin.arrivals}
-    sparse_event = SparseEvent(
-        resource_id=event.resource_id.id,
-        origin_time=origin_time,
-        picks=[SparsePick(
-            tt=pick.time - origin_time,
-            time=pick.time,
-            seed_id=pick.waveform_id.get_seed_string(),
-            phase_hint=pick.phase_hint[0],  # Only use P or S hints.
-            time_weight=time_weight_dict.get(pick.resource_id, 1.0),
-            waveform_id=pick.waveform_id)
-            for pick in event.picks])
-    return sparse_event
+        arr.pick_id.id: arr.time_weight or 1.0 for origin in event.origins
+        for arr in origin.arrivals if arr.pick_id is not None}
+    picks = []
+    for pick_time, waveform_id, phase_hint, resource_id in map(
+            _pick_fields, event.picks):
+        picks.append(SparsePick(
+            tt=pick_time - origin_time,
+            time=pick_time,
+            seed_id=_get_seed_id(waveform_id),
+            phase_hint=phase_hint[0],  # Only use P or S hints.
+            time_weight=time_weight_dict.get(resource_id.id, 1.0),
+            waveform_id=waveform_id))
+    return SparseEvent(
+        resource_id=event.resource_id.id, origin_time=origin_time,
+        picks=picks)
 
 
 def _prepare_stream(stream, event, extract_len, pre_pick, seed_pick_ids=None):
@@ -172,12 +217,12 @@ def _prepare_stream(stream, event, extract_len, pre_pick, seed_pick_ids=None):
     returns a dictionary of traces keyed by phase_hint.
     """
     seed_pick_ids = seed_pick_ids or {
-        SeedPickID(pick.waveform_id.get_seed_string(), pick.phase_hint[0])
+        SeedPickID(_get_seed_id(pick.waveform_id), pick.phase_hint[0])
         for pick in event.picks if pick.phase_hint.startswith(("P", "S"))}
     stream_sliced = defaultdict(Stream)
     for seed_pick_id in seed_pick_ids:
         pick = [pick for pick in event.picks
-                if pick.waveform_id.get_seed_string() == seed_pick_id.seed_id
+                if _get_seed_id(pick.waveform_id) == seed_pick_id.seed_id
                 and pick.phase_hint[0] == seed_pick_id.phase_hint]
         if len(pick) > 1:
             Logger.warning(
@@ -194,13 +239,16 @@ def _prepare_stream(stream, event, extract_len, pre_pick, seed_pick_ids=None):
             continue
         else:
             tr = tr[0]
-        Logger.debug(
-            f"Trimming trace on {tr.id} between {tr.stats.starttime} - "
-            f"{tr.stats.endtime} to {pick.time - pre_pick} - "
-            f"{(pick.time - pre_pick) + extract_len}")
+        starttime = pick.time - pre_pick
+        endtime = starttime + extract_len
+        # Called per pick and per event: skip formatting the UTCDateTimes
+        # unless the message will be emitted.
+        if Logger.isEnabledFor(logging.DEBUG):
+            Logger.debug(
+                f"Trimming trace on {tr.id} between {tr.stats.starttime} - "
+                f"{tr.stats.endtime} to {starttime} - {endtime}")
         tr = stream.select(id=seed_pick_id.seed_id).slice(
-            starttime=pick.time - pre_pick,
-            endtime=(pick.time - pre_pick) + extract_len).merge()
+            starttime=starttime, endtime=endtime).merge()
         if len(tr) == 0:
             continue
         if len(tr) > 1:
@@ -233,10 +281,10 @@ def _compute_dt_correlations(catalog, master, min_link, event_id_mapper,
     available_seed_ids = {tr.id for st in master_stream.values() for tr in st}
     Logger.debug(f"The channels provided are: {available_seed_ids}")
     master_seed_ids = {
-        SeedPickID(pick.waveform_id.get_seed_string(), pick.phase_hint[0])
+        SeedPickID(_get_seed_id(pick.waveform_id), pick.phase_hint[0])
         for pick in master.picks if
         pick.phase_hint[0] in "PS" and
-        pick.waveform_id.get_seed_string() in available_seed_ids}
+        _get_seed_id(pick.waveform_id) in available_seed_ids}
     Logger.debug(f"Using channels: {master_seed_ids}")
     # Dictionary of travel-times for master keyed by {station}_{phase_hint}
     master_tts = dict()
@@ -405,25 +453,29 @@ def _make_event_pair(sparse_event, master, event_id_mapper, min_link):
     """
     Make an event pair for a given event and master event.
     """
-    differential_times = _EventPair(
-        event_id_1=event_id_mapper[master.resource_id],
-        event_id_2=event_id_mapper[sparse_event.resource_id])
+    # Group picks once rather than scanning all picks for each master pick.
+    station_phase_picks = defaultdict(list)
+    for pick in sparse_event.picks:
+        station_phase_picks[(pick.station, pick.phase_hint)].append(pick)
+    obs = []
     for master_pick in master.picks:
         if master_pick.phase_hint and \
                 master_pick.phase_hint not in "PS":  # pragma: no cover
             continue
-        matched_picks = [p for p in sparse_event.picks
-                         if p.station == master_pick.station
-                         and p.phase_hint == master_pick.phase_hint]
+        matched_picks = station_phase_picks.get(
+            (master_pick.station, master_pick.phase_hint), ())
         for matched_pick in matched_picks:
-            differential_times.obs.append(
+            obs.append(
                 _DTObs(station=master_pick.station,
                        tt1=master_pick.tt, tt2=matched_pick.tt,
                        weight=(master_pick.time_weight +
                                matched_pick.time_weight) / 2.0,
                        phase=master_pick.phase_hint))
-    if len(differential_times.obs) >= min_link:
-        return differential_times
+    # Most pairs are not linked, only make the pair if we need it.
+    if len(obs) >= min_link:
+        return _EventPair(
+            event_id_1=event_id_mapper[master.resource_id],
+            event_id_2=event_id_mapper[sparse_event.resource_id], obs=obs)
     return
 
 
@@ -661,10 +713,10 @@ def write_catalog(catalog, event_id_mapper=None, max_sep=8, min_link=8,
         catalog=catalog, correlation=False, event_id_mapper=event_id_mapper,
         max_sep=max_sep, min_link=min_link, max_workers=max_workers)
     with open("dt.ct", "w") as f:
-        for master_id, linked_events in differential_times.items():
-            for linked_event in linked_events:
-                f.write(linked_event.ct_string)
-                f.write("\n")
+        f.writelines(
+            linked_event.ct_string + "\n"
+            for linked_events in differential_times.values()
+            for linked_event in linked_events)
     return event_id_mapper
 
 
@@ -786,10 +838,10 @@ def write_correlations(catalog, stream_dict, extract_len, pre_pick,
         extract_len=extract_len, pre_pick=pre_pick, shift_len=shift_len,
         interpolate=interpolate, all_horiz=all_horiz, **kwargs)
     with open("dt.cc", "w") as f:
-        for master_id, linked_events in correlation_times.items():
-            for linked_event in linked_events:
-                f.write(linked_event.cc_string)
-                f.write("\n")
+        f.writelines(
+            linked_event.cc_string + "\n"
+            for linked_events in correlation_times.values()
+            for linked_event in linked_events)
     return event_id_mapper
 
 
@@ -826,15 +878,17 @@ def _hypodd_phase_str(event, event_id_mapper):
     x_err = (origin.longitude_errors.uncertainty or 0.0) / 1000.
     y_err = (origin.latitude_errors.uncertainty or 0.0) / 1000.
     x_err = max(x_err, y_err)
+    # Each UTCDateTime field access builds a new datetime, convert once.
+    origin_time = origin.time.datetime
 
     event_str = [(
         "# {year:4d} {month:02d} {day:02d} {hour:02d} {minute:02d} "
         "{second:02d} {latitude:10.6f} {longitude: 10.6f} {depth:10.6f} "
         "{magnitude:4.2f} {err_h:4.2f} {err_z:4.2f} {t_rms:4.2f} "
         "{event_id:9d}".format(
-            year=origin.time.year, month=origin.time.month,
-            day=origin.time.day, hour=origin.time.hour,
-            minute=origin.time.minute, second=origin.time.second,
+            year=origin_time.year, month=origin_time.month,
+            day=origin_time.day, hour=origin_time.hour,
+            minute=origin_time.minute, second=origin_time.second,
             latitude=origin.latitude, longitude=origin.longitude,
             depth=origin.depth / 1000., magnitude=magnitude,
             err_h=x_err, err_z=z_err, t_rms=time_error,
@@ -926,18 +980,18 @@ def _phase_to_event(event_text):
     # Extract info from header line
     # YR, MO, DY, HR, MN, SC, LAT, LON, DEP, MAG, EH, EZ, RMS, ID
     header = event_text['header'].split()
-    ph_event.origins.append(Origin())
-    ph_event.origins[0].time = \
-        UTCDateTime(year=int(header[1]), month=int(header[2]),
-                    day=int(header[3]), hour=int(header[4]),
-                    minute=int(header[5]), second=int(header[6].split('.')[0]),
-                    microsecond=int(float(('0.' + header[6].split('.')[1])) *
-                                    1000000))
-    ph_event.origins[0].latitude = float(header[7])
-    ph_event.origins[0].longitude = float(header[8])
-    ph_event.origins[0].depth = float(header[9]) * 1000
-    ph_event.origins[0].quality = OriginQuality(
-        standard_error=float(header[13]))
+    origin = Origin()
+    ph_event.origins.append(origin)
+    # Offset from the minute rather than splitting seconds into
+    # second and microsecond fields.
+    origin_time = UTCDateTime(
+        int(header[1]), int(header[2]), int(header[3]), int(header[4]),
+        int(header[5])) + float(header[6])
+    origin.time = origin_time
+    origin.latitude = float(header[7])
+    origin.longitude = float(header[8])
+    origin.depth = float(header[9]) * 1000
+    origin.quality = OriginQuality(standard_error=float(header[13]))
     ph_event.magnitudes.append(Magnitude())
     ph_event.magnitudes[0].mag = float(header[10])
     ph_event.magnitudes[0].magnitude_type = 'M'
@@ -945,14 +999,13 @@ def _phase_to_event(event_text):
     for i, pick_line in enumerate(event_text['picks']):
         pick = pick_line.split()
         _waveform_id = WaveformStreamID(station_code=pick[0])
-        pick_time = ph_event.origins[0].time + float(pick[1])
+        pick_time = origin_time + float(pick[1])
         ph_event.picks.append(Pick(waveform_id=_waveform_id,
                                    phase_hint=pick[3],
                                    time=pick_time))
-        ph_event.origins[0].arrivals.append(Arrival(phase=ph_event.picks[i],
-                                                    pick_id=ph_event.picks[i].
-                                                    resource_id))
-        ph_event.origins[0].arrivals[i].time_weight = float(pick[2])
+        origin.arrivals.append(Arrival(phase=ph_event.picks[i],
+                                       pick_id=ph_event.picks[i].resource_id))
+        origin.arrivals[i].time_weight = float(pick[2])
     return ph_event
 
 
@@ -987,16 +1040,17 @@ def _hypodd_event_str(event, event_id):
     x_err = (origin.longitude_errors.uncertainty or 0.0) / 1000.
     y_err = (origin.latitude_errors.uncertainty or 0.0) / 1000.
     x_err = max(x_err, y_err)
+    origin_time = origin.time.datetime
 
     event_str = (
         "{year:4d}{month:02d}{day:02d}  {hour:2d}{minute:02d}"
         "{seconds:02d}{microseconds:02d}  {latitude:8.4f}  {longitude:9.4f}"
         "   {depth:8.4f}  {magnitude:5.2f}  {x_err:5.2f}  {z_err:5.2f}  "
         "{time_err:5.2f}  {event_id:9d}".format(
-            year=origin.time.year, month=origin.time.month,
-            day=origin.time.day, hour=origin.time.hour,
-            minute=origin.time.minute, seconds=origin.time.second,
-            microseconds=round(origin.time.microsecond / 1e4),
+            year=origin_time.year, month=origin_time.month,
+            day=origin_time.day, hour=origin_time.hour,
+            minute=origin_time.minute, seconds=origin_time.second,
+            microseconds=round(origin_time.microsecond / 1e4),
             latitude=origin.latitude, longitude=origin.longitude,
             depth=origin.depth / 1000., magnitude=magnitude,
             x_err=x_err, z_err=z_err, time_err=time_error, event_id=event_id))
@@ -92,24 +92,28 @@ def filter_picks(catalog, stations=None, channels=None, networks=None,
     filtered_catalog = catalog.copy()
 
     if stations:
+        stations = set(stations)
         for event in filtered_catalog:
             if len(event.picks) == 0:
                 continue
             event.picks = [pick for pick in event.picks
                            if pick.waveform_id.station_code in stations]
     if channels:
+        channels = set(channels)
         for event in filtered_catalog:
             if len(event.picks) == 0:
                 continue
             event.picks = [pick for pick in event.picks
                            if pick.waveform_id.channel_code in channels]
     if networks:
+        networks = set(networks)
         for event in filtered_catalog:
             if len(event.picks) == 0:
                 continue
             event.picks = [pick for pick in event.picks
                            if pick.waveform_id.network_code in networks]
     if locations:
+        locations = set(locations)
         for event in filtered_catalog:
             if len(event.picks) == 0:
                 continue
@@ -147,6 +151,7 @@ def filter_picks(catalog, stations=None, channels=None, networks=None,
             if len(all_picks) > top_n_picks:
                 all_picks = all_picks[0:top_n_picks]
                 break
+        all_picks = set(all_picks)
         for event in filtered_catalog:
             if len(event.picks) == 0:
                 continue
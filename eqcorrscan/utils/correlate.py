@@ -447,7 +447,9 @@ def numpy_normxcorr(templates, stream, pads, *args, **kwargs):
     res[np.isnan(res)] = 0.0
 
     for i, pad in enumerate(pads):
-        res[i] = np.append(res[i], np.zeros(pad))[pad:]
+        if pad:
+            res[i, :-pad] = res[i, pad:]
+            res[i, -pad:] = 0.0
     return res.astype(np.float32), used_chans
 
 
@@ -529,6 +531,35 @@ def time_multi_normxcorr(templates, stream, pads, threaded=False, *args,
     return ccc, used_chans
 
 
+def _get_fft_len(template_len, stream_len, fft_len=None):
+    """
+    Work out the FFT length to use for the fftw correlation backends.
+
+    :type template_len: int
+    :param template_len: Length of the templates in samples.
+    :type stream_len: int
+    :param stream_len: Length of the continuous data in samples.
+    :type fft_len: int
+    :param fft_len: Requested FFT length, or None to use the default.
+
+    :return: int
+    """
+    full_len = next_fast_len(template_len + stream_len - 1)
+    if fft_len is None:
+        # In testing, 2**13 consistently comes out fastest - setting to
+        # default. https://github.com/eqcorrscan/EQcorrscan/pull/285
+        fft_len = min(2 ** 13, full_len)
+    if fft_len < template_len:
+        # Keep working in blocks rather than transforming the whole stream
+        # at once, the block just has to hold the template.
+        _fft_len = min(next_fast_len(2 * template_len), full_len)
+        Logger.warning(
+            f"FFT length of {fft_len} is shorter than the template, setting to"
+            f" {_fft_len}")
+        fft_len = _fft_len
+    return fft_len
+
+
 @register_array_xcorr('fftw', is_default=True)
 def fftw_normxcorr(templates, stream, pads, threaded=False, *args, **kwargs):
     """
@@ -593,18 +624,8 @@ def fftw_normxcorr(templates, stream, pads, threaded=False, *args, **kwargs):
     template_length = templates.shape[1]
     stream_length = len(stream)
     n_templates = templates.shape[0]
-    fftshape = kwargs.get("fft_len")
-    if fftshape is None:
-        # In testing, 2**13 consistently comes out fastest - setting to
-        # default. https://github.com/eqcorrscan/EQcorrscan/pull/285
-        fftshape = min(
-            2 ** 13, next_fast_len(template_length + stream_length - 1))
-    if fftshape < template_length:
-        Logger.warning(
-            "FFT length of {0} is shorter than the template, setting to "
-            "{1}".format(
-                fftshape, next_fast_len(template_length + stream_length - 1)))
-        fftshape = next_fast_len(template_length + stream_length - 1)
+    fftshape = _get_fft_len(
+        template_length, stream_length, kwargs.get("fft_len"))
     # Normalize and flip the templates
     norm = ((templates - templates.mean(axis=-1, keepdims=True)) / (
         templates.std(axis=-1, keepdims=True) * template_length))
@@ -842,15 +863,7 @@ def fftw_multi_normxcorr(template_array, stream_array, pad_array, seed_ids,
     n_channels = len(seed_ids)
     n_templates = template_array[seed_ids[0]].shape[0]
     image_len = stream_array[seed_ids[0]].shape[0]
-    # In testing, 2**13 consistently comes out fastest - setting to
-    # default. https://github.com/eqcorrscan/EQcorrscan/pull/285
-    fft_len = kwargs.get(
-        "fft_len", min(2 ** 13, next_fast_len(template_len + image_len - 1)))
-    if fft_len < template_len:
-        Logger.warning(
-            f"FFT length of {fft_len} is shorter than the template, setting to"
-            f" {next_fast_len(template_len + image_len - 1)}")
-        fft_len = next_fast_len(template_len + image_len - 1)
+    fft_len = _get_fft_len(template_len, image_len, kwargs.get("fft_len"))
     template_array = np.ascontiguousarray(
         [template_array[x] for x in seed_ids], dtype=np.float32)
     multipliers = {}
@@ -1122,17 +1135,25 @@ def _get_array_dicts(templates, stream, stack, copy_streams=True):
     stream_start = min([tr.stats.starttime for tr in stream])
     # get seed ids, make sure these are collected on sorted streams
     seed_ids = [tr.id + '_' + str(i) for i, tr in enumerate(templates[0])]
+    # Index the stream once rather than selecting for every channel, keep
+    # the first trace for each id as select()[0] would.
+    stream_channels = {}
+    for tr in stream:
+        stream_channels.setdefault(tr.id, tr)
     # pull common channels out of streams and templates and put in dicts
     for i, seed_id in enumerate(seed_ids):
-        temps_with_seed = [template[i].data for template in templates]
-        t_ar = np.array(temps_with_seed).astype(np.float32)
+        t_ar = np.array(
+            [template[i].data for template in templates], dtype=np.float32)
         template_dict.update({seed_id: t_ar})
-        stream_channel = stream.select(id=seed_id.split('_')[0])[0]
-        # Normalize data to ensure no float overflow
-        stream_data = stream_channel.data / (np.max(
-            np.abs(stream_channel.data)) / 1e5)
-        stream_dict.update(
-            {seed_id: stream_data.astype(np.float32)})
+        stream_channel = stream_channels[seed_id.split('_')[0]]
+        # Normalize data to ensure no float overflow, writing straight to
+        # single precision rather than through a double precision copy.
+        stream_data = np.divide(
+            stream_channel.data,
+            np.max(np.abs(stream_channel.data)) / 1e5,
+            out=np.empty(stream_channel.stats.npts, dtype=np.float32),
+            casting='same_kind')
+        stream_dict.update({seed_id: stream_data})
         # PROBLEM - DEBUG: if two traces start just before / just after a
         # "full-sample-time", then stream_offset can become 1, while a value in
         # pad_list can become 0. 0-1 = -1; which is problematic.
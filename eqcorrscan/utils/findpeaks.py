@@ -192,7 +192,7 @@ def multi_find_peaks(arr, thresh, trig_int, parallel=True, full_peaks=False,
 
     :type arr: numpy.ndarray
     :param arr: 2-D numpy array is required
-    :type thresh: list
+    :type thresh: list or numpy.ndarray
     :param thresh:
         The threshold below which will be considered noise and peaks will not
         be found in. One threshold per array.
@@ -217,7 +217,13 @@ def multi_find_peaks(arr, thresh, trig_int, parallel=True, full_peaks=False,
         List of list of tuples of (peak, index) in same order as input arrays
     """
     peaks = []
-    if not parallel:
+    compiled = internal_func.__name__ == 'find_peaks_compiled'
+    if not parallel and compiled:
+        # The compiled multi-array routines work through all arrays in one
+        # call, use them single-threaded.
+        peaks = _multi_find_peaks_compiled(
+            arr, thresh, trig_int, full_peaks=full_peaks, cores=1)
+    elif not parallel:
         for sub_arr, arr_thresh in zip(arr, thresh):
             peaks.append(internal_func(
                 arr=sub_arr, thresh=arr_thresh, trig_int=trig_int,
@@ -225,7 +231,7 @@ def multi_find_peaks(arr, thresh, trig_int, parallel=True, full_peaks=False,
     else:
         if cores is None:
             cores = min(arr.shape[0], cpu_count())
-        if internal_func.__name__ != 'find_peaks_compiled':
+        if not compiled:
             with pool_boy(Pool=Pool, traces=arr.shape[0], cores=cores) as pool:
                 params = ((sub_arr, arr_thresh, trig_int, full_peaks)
                           for sub_arr, arr_thresh in zip(arr, thresh))
@@ -283,8 +289,14 @@ def _multi_find_peaks_compiled(arrays, thresholds, trig_int, full_peaks,
         peak_indices = _peak_indices
         thresholds = _thresholds
     else:
-        peak_vals = arrays
-        peak_indices = [np.arange(arr.shape[0]) for arr in arrays]
+        # Every sample above threshold is a candidate, there is no need to
+        # index the rest.
+        peak_indices = [
+            np.flatnonzero(
+                np.abs(arr.astype(np.float32, copy=False)) >= threshold)
+            for arr, threshold in zip(
+                arrays, np.asarray(thresholds, dtype=np.float32))]
+        peak_vals = [arr[inds] for arr, inds in zip(arrays, peak_indices)]
         peak_mapper = {i: i for i in range(len(peak_indices))}
     if len(peak_indices) > 0:
         peaks = _multi_decluster(
@@ -320,15 +332,26 @@ def _multi_decluster(peaks, indices, trig_int, thresholds, cores):
     """
     utilslib = _load_cdll('libutils')
 
+    # Peaks below their threshold can never be kept, so do not sort them
+    thresholds = np.ascontiguousarray(thresholds, dtype=np.float32)
+    peaks_above, indices_above = [], []
+    for _peaks, _indices, threshold in zip(peaks, indices, thresholds):
+        above = np.abs(_peaks.astype(np.float32, copy=False)) >= threshold
+        peaks_above.append(_peaks[above])
+        indices_above.append(_indices[above])
+    peaks, indices = peaks_above, indices_above
+
     lengths = np.array([peak.shape[0] for peak in peaks], dtype=int)
     trig_int = int(trig_int)
     n = np.int32(len(peaks))
     cores = min(cores, n)
 
     total_length = lengths.sum()
+    if total_length == 0:
+        return [[] for _ in peaks]
 
-    max_indexes = [_indices.max() for _indices in indices]
-    max_index = max(max_indexes)
+    max_index = max(_indices.max() for _indices in indices
+                    if _indices.shape[0])
     for var in [trig_int, lengths.max(), max_index]:
         if var == ctypes.c_long(var).value:
             long_type = ctypes.c_long
@@ -375,7 +398,6 @@ def _multi_decluster(peaks, indices, trig_int, thresholds, cores):
     indices_sorted = np.ascontiguousarray(
         indices_sorted, dtype=long_type)
     lengths = np.ascontiguousarray(lengths, dtype=long_type)
-    thresholds = np.ascontiguousarray(thresholds, dtype=np.float32)
     out = np.zeros(total_length, dtype=np.uint32)
     ret = func(
         peaks_sorted, indices_sorted, lengths, np.int32(n), thresholds,
@@ -424,7 +446,14 @@ def decluster_distance_time(peaks, index, trig_int, catalog,
     """
     utilslib = _load_cdll('libutils')
 
+    # Peaks below the threshold can never be kept, so do not sort them
+    above = np.abs(peaks.astype(np.float32, copy=False)) >= np.float32(
+        threshold)
+    peaks, index = peaks[above], index[above]
+    catalog = [event for event, keep in zip(catalog, above) if keep]
     length = peaks.shape[0]
+    if length == 0:
+        return []
     trig_int = int(trig_int)
 
     for var in [index.max(), trig_int]:
@@ -563,7 +592,8 @@ def _multi_find_peaks_c(arrays, thresholds, threads):
     length = arrays.shape[1]
     n = np.int32(arrays.shape[0])
     thresholds = np.ascontiguousarray(thresholds, np.float32)
-    arr = np.ascontiguousarray(arrays.flatten(), np.float32)
+    # The C function does not modify the data, so only copy if needed
+    arr = np.ascontiguousarray(arrays, np.float32).ravel()
     utilslib.multi_find_peaks.argtypes = [
         np.ctypeslib.ndpointer(dtype=np.float32, shape=(n * length,),
                                flags='C_CONTIGUOUS'),
@@ -578,16 +608,13 @@ def _multi_find_peaks_c(arrays, thresholds, threads):
     out = np.ascontiguousarray(np.zeros((n * length, ), dtype=np.uint32))
     ret = utilslib.multi_find_peaks(
         arr, ctypes.c_long(length), n, thresholds, threads, out)
-    # Copy data to avoid farking the users data
     if ret != 0:
         raise MemoryError("Internal error")
-    peaks = []
-    peak_locations = []
-    out = out.reshape(n, length)
-    for i in range(n):
-        peak_locs = np.nonzero(out[i])
-        peaks.append(arrays[i][peak_locs])
-        peak_locations.append(peak_locs[0])
+    # Find peaks for all arrays at once, then split by array
+    rows, cols = np.nonzero(out.reshape(n, length))
+    splits = np.searchsorted(rows, np.arange(1, n))
+    peaks = np.split(arrays[rows, cols], splits)
+    peak_locations = np.split(cols, splits)
 
     return peaks, peak_locations
 
@@ -13,7 +13,7 @@ import numpy as np
 import logging
 import datetime as dt
 
-from collections import Counter
+from collections import Counter, defaultdict
 from multiprocessing import Pool, cpu_count
 
 from obspy import Stream, Trace, UTCDateTime
@@ -50,7 +50,8 @@ def _check_daylong(tr):
     >>> _check_daylong(st[0])
     True
     """
-    if len(np.nonzero(tr.data)[0]) < 0.5 * len(tr.data):
+    # Masked (gap) samples do not count as data
+    if np.count_nonzero(np.ma.filled(tr.data, 0)) < 0.5 * len(tr.data):
         qual = False
     else:
         qual = True
@@ -894,16 +895,21 @@ def _prep_data_for_correlation(stream, templates, template_names=None,
     for template_name in incomplete_templates:
         template = _out[template_name]
         template_starttime = min(tr.stats.starttime for tr in template)
-        out_template = nan_template.copy()
-        for channel_number, _seed_id in enumerate(seed_ids):
+        template_channels = defaultdict(list)
+        for tr in template:
+            template_channels[tr.id].append(tr)
+        out_template = Stream()
+        # Only copy the nan channels that are actually needed
+        for nan_trace, _seed_id in zip(nan_template, seed_ids):
             seed_id, channel_index = _seed_id
-            template_channel = template.select(id=seed_id)
+            template_channel = template_channels.get(seed_id, [])
             if len(template_channel) <= channel_index:
-                out_template[channel_number].data = nan_channel
-                out_template[channel_number].stats.starttime = \
-                    template_starttime
+                nan_trace = nan_trace.copy()
+                nan_trace.data = nan_channel
+                nan_trace.stats.starttime = template_starttime
+                out_template += nan_trace
             else:
-                out_template[channel_number] = template_channel[channel_index]
+                out_template += template_channel[channel_index]
         # If a template-trace matches a NaN-trace in the stream , then set
         # template-trace to NaN so that this trace does not appear in channel-
         # list of detections.
@@ -88,11 +88,54 @@ int decluster_dist_time_ll(float *arr, long long *indexes, float *distances,
 int decluster_ll(float *arr, long long *indexes, long long len,
                  float thresh, long long trig_int, unsigned int *out){
     // Takes a sorted array and the indexes
-    long long i, j, step;
+    long long i, j, step, min_index, max_index, n_buckets, bucket, b;
+    long long *kept;
     int keep;
 
-    if (fabs(arr[0]) < thresh){return 0;}
+    if (len < 1 || fabs(arr[0]) < thresh){return 0;}
+
+    // Kept peaks are more than trig_int apart, so buckets of trig_int + 1
+    // samples hold at most one kept peak each, and only the neighbouring
+    // buckets need to be checked for each candidate.
+    min_index = indexes[0];
+    max_index = indexes[0];
+    for (i = 1; i < len; ++i){
+        if (indexes[i] < min_index){min_index = indexes[i];}
+        if (indexes[i] > max_index){max_index = indexes[i];}
+    }
+    n_buckets = (max_index - min_index) / (trig_int + 1) + 1;
+    kept = NULL;
+    if (n_buckets <= 4 * len + 1024){
+        kept = (long long *) malloc(n_buckets * sizeof(long long));
+    }
+    if (kept != NULL){
+        for (b = 0; b < n_buckets; ++b){kept[b] = -1;}
+        for (i = 0; i < len; ++i){
+            if (fabs(arr[i]) < thresh){
+                break;
+            }
+            keep = 1;
+            bucket = (indexes[i] - min_index) / (trig_int + 1);
+            for (b = bucket - 1; b <= bucket + 1; ++b){
+                if (b < 0 || b >= n_buckets || kept[b] < 0){continue;}
+                step = llabs(indexes[i] - indexes[kept[b]]);
+                if (trig_int >= step){
+                    keep = 0;
+                    break;
+                }
+            }
+            if (keep == 1){
+                kept[bucket] = i;
+                out[i] = 1;
+            }
+            else {out[i] = 0;}
+        }
+        free(kept);
+        return 0;
+    }
 
+    // Fall back to checking against all previous peaks when the index range
+    // is too sparse for buckets.
     // Take first (highest) peak
     out[0] = 1;
     for (i = 1; i < len; ++i){
@@ -143,11 +186,51 @@ int multi_decluster_ll(float *arr, long long *indices,
 int decluster(float *arr, long *indexes, long len,
               float thresh, long trig_int, unsigned int *out){
     // Takes a sorted array and the indexes
-    long i, j, step;
+    long i, j, step, min_index, max_index, n_buckets, bucket, b;
+    long *kept;
     int keep;
 
-    if (fabs(arr[0]) < thresh){return 0;}
+    if (len < 1 || fabs(arr[0]) < thresh){return 0;}
+
+    // Buckets of trig_int + 1 samples, see decluster_ll
+    min_index = indexes[0];
+    max_index = indexes[0];
+    for (i = 1; i < len; ++i){
+        if (indexes[i] < min_index){min_index = indexes[i];}
+        if (indexes[i] > max_index){max_index = indexes[i];}
+    }
+    n_buckets = (max_index - min_index) / (trig_int + 1) + 1;
+    kept = NULL;
+    if (n_buckets <= 4 * len + 1024){
+        kept = (long *) malloc(n_buckets * sizeof(long));
+    }
+    if (kept != NULL){
+        for (b = 0; b < n_buckets; ++b){kept[b] = -1;}
+        for (i = 0; i < len; ++i){
+            if (fabs(arr[i]) < thresh){
+                break;
+            }
+            keep = 1;
+            bucket = (indexes[i] - min_index) / (trig_int + 1);
+            for (b = bucket - 1; b <= bucket + 1; ++b){
+                if (b < 0 || b >= n_buckets || kept[b] < 0){continue;}
+                step = labs(indexes[i] - indexes[kept[b]]);
+                if (trig_int >= step){
+                    keep = 0;
+                    break;
+                }
+            }
+            if (keep == 1){
+                kept[bucket] = i;
+                out[i] = 1;
+            }
+            else {out[i] = 0;}
+        }
+        free(kept);
+        return 0;
+    }
 
+    // Fall back to checking against all previous peaks
     // Take first (highest) peak
     out[0] = 1;
     for (i = 1; i < len; ++i){